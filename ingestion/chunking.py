@@ -0,0 +1,137 @@
+import hashlib
+import json
+
+READ_SIZE = 1 << 16
+
+SECTIONS = ['overview', 'symptoms', 'causes', 'diagnosis',
+            'treatment', 'prognosis', 'prevention', 'complications']
+
+def make_doc_id(article_data, index):
+    """Build the document id used as the chunk_id prefix"""
+    return article_data.get('name', f'article_{index}').replace(' ', '_').lower()
+
+def chunks_from_article(article_data, index):
+    """Create one chunk per non-empty section of an article"""
+
+    doc_id = make_doc_id(article_data, index)
+    chunks = []
+
+    for section in SECTIONS:
+        if section in article_data and article_data[section] and str(article_data[section]).strip():
+            chunks.append({
+                'doc_id': doc_id,
+                'section': section,
+                'content': str(article_data[section]).strip(),
+                'url': article_data.get('url', ''),
+                'title': article_data.get('name', f'Article {index}'),
+                'chunk_id': f"{doc_id}_{section}"
+            })
+
+    return chunks
+
+def iter_json_array(text_stream, read_size=READ_SIZE):
+    """
+    Yield the elements of a top-level JSON array one at a time. Only the element being
+    decoded plus one read buffer is held in memory. A single top-level object is yielded as-is.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        data = text_stream.read(read_size)
+        if not data:
+            eof = True
+        buffer = buffer[pos:] + data
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip(' \t\r\n')
+    if pos >= len(buffer):
+        return
+
+    if buffer[pos] != '[':
+        while not eof:
+            fill()
+        yield json.loads(buffer[pos:])
+        return
+
+    pos += 1
+    while True:
+        skip(' \t\r\n,')
+        if pos >= len(buffer):
+            raise ValueError('Unexpected end of JSON array')
+        if buffer[pos] == ']':
+            return
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+
+        # A number cut at a read boundary ("1." / "1e") decodes as a shorter number,
+        # so only accept an element once the next delimiter is in the buffer.
+        following = end
+        while following < len(buffer) and buffer[following] in ' \t\r\n':
+            following += 1
+        if following == len(buffer) or buffer[following] not in ',]':
+            if eof:
+                raise json.JSONDecodeError('Expecting \',\' delimiter', buffer, following)
+            fill()
+            continue
+
+        pos = end
+        yield element
+
+def iter_section_chunks(articles):
+    """
+    Yield section chunks for a stream of articles, skipping duplicate chunk_ids.
+    Only the chunk_ids seen so far are retained, never the chunk content.
+    """
+
+    seen_chunk_ids = set()
+    article_count = 0
+    duplicates_found = 0
+
+    for i, article_data in enumerate(articles):
+        if not isinstance(article_data, dict):
+            continue
+        article_count += 1
+
+        for chunk in chunks_from_article(article_data, i):
+            if chunk['chunk_id'] in seen_chunk_ids:
+                duplicates_found += 1
+                continue
+            seen_chunk_ids.add(chunk['chunk_id'])
+            yield chunk
+
+        if article_count % 1000 == 0:
+            print(f"Processed {article_count:,} articles...")
+
+    print(f"Chunked {article_count:,} articles into {len(seen_chunk_ids):,} chunks ({duplicates_found:,} duplicates skipped)")
+
+def build_section_chunks(articles):
+    """Create section chunks for every article as a list"""
+    return list(iter_section_chunks(articles))
+
+def compute_chunk_hash(chunk):
+    """Hash every field that ends up in the stored DynamoDB item"""
+    payload = json.dumps(
+        [chunk['doc_id'], chunk['title'], chunk['section'], chunk['url'], chunk['content']],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
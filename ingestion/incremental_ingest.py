@@ -0,0 +1,387 @@
+"""
+Incremental ingestion for the MedicalEmbeddings table.
+
+Hashes every section chunk, diffs the hashes against the manifest kept in
+DocumentMetadata and only re-embeds, writes or deletes what changed. The
+corpus version is bumped afterwards so the Lambda query cache rolls over.
+
+Usage:
+    python incremental_ingest.py --dry-run
+    python incremental_ingest.py --input all_articles.json --workers 8
+"""
+
+import argparse
+import codecs
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+
+import boto3
+
+from chunking import build_section_chunks, compute_chunk_hash, iter_json_array
+
+DEFAULT_BUCKET = 'medical-rag-data-b01015847'
+DEFAULT_KEY = 'raw-data/all_articles.json'
+
+EMBEDDINGS_TABLE = 'MedicalEmbeddings'
+METADATA_TABLE = 'DocumentMetadata'
+CORPUS_VERSION_DOCUMENT_ID = '__corpus_version__'
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+MAX_CONTENT_LENGTH = 4000
+MAX_WRITE_ATTEMPTS = 5
+MAX_DELETE_FRACTION = 0.1
+
+_model = None
+_thread_state = threading.local()
+
+def get_embedding_model():
+    """Load the sentence-transformers model only when something needs embedding"""
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        print(f"Loading embedding model {EMBEDDING_MODEL_NAME}...")
+        _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _model
+
+def get_thread_table(table_name):
+    """boto3 resources are not thread-safe, so each worker gets its own session"""
+    tables = getattr(_thread_state, 'tables', None)
+    if tables is None:
+        tables = _thread_state.tables = {}
+    if table_name not in tables:
+        tables[table_name] = boto3.session.Session().resource('dynamodb').Table(table_name)
+    return tables[table_name]
+
+def open_articles(input_path=None, bucket=DEFAULT_BUCKET, key=DEFAULT_KEY):
+    """Open the raw articles file from a local path or S3 as a text stream"""
+
+    if input_path:
+        print(f"Streaming articles from {input_path}...")
+        return open(input_path, 'r', encoding='utf-8')
+
+    print(f"Streaming articles from s3://{bucket}/{key}...")
+    s3 = boto3.client('s3')
+    file_response = s3.get_object(Bucket=bucket, Key=key)
+    return codecs.getreader('utf-8')(file_response['Body'])
+
+def load_manifest():
+    """Load {doc_id: {chunk_id: content_hash}} from DocumentMetadata"""
+
+    table = get_thread_table(METADATA_TABLE)
+    manifest = {}
+
+    scan_kwargs = {'ProjectionExpression': 'document_id, chunk_hashes'}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            if item['document_id'] == CORPUS_VERSION_DOCUMENT_ID or 'chunk_hashes' not in item:
+                continue
+            manifest[item['document_id']] = dict(item['chunk_hashes'])
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    chunk_count = sum(len(hashes) for hashes in manifest.values())
+    print(f"Loaded manifest: {len(manifest):,} documents, {chunk_count:,} chunks")
+    return manifest
+
+def diff_against_manifest(chunks, manifest):
+    """Split chunks into new/changed/unchanged and find chunk_ids that were removed"""
+
+    previous_hashes = {}
+    for hashes in manifest.values():
+        previous_hashes.update(hashes)
+
+    new_chunks = []
+    changed_chunks = []
+    unchanged_count = 0
+
+    for chunk in chunks:
+        previous_hash = previous_hashes.get(chunk['chunk_id'])
+        if previous_hash is None:
+            new_chunks.append(chunk)
+        elif previous_hash != chunk['content_hash']:
+            changed_chunks.append(chunk)
+        else:
+            unchanged_count += 1
+
+    current_chunk_ids = {chunk['chunk_id'] for chunk in chunks}
+    removed_chunk_ids = [chunk_id for chunk_id in previous_hashes if chunk_id not in current_chunk_ids]
+
+    return {
+        'new': new_chunks,
+        'changed': changed_chunks,
+        'removed': removed_chunk_ids,
+        'unchanged_count': unchanged_count
+    }
+
+def check_mass_delete(chunks, diff, manifest):
+    """Return why applying this diff looks like a mass delete, or None if it is safe"""
+
+    manifest_chunk_count = sum(len(hashes) for hashes in manifest.values())
+
+    if not chunks:
+        return 'input produced no chunks (empty, wrong or malformed file?)'
+
+    if manifest_chunk_count and len(diff['removed']) > manifest_chunk_count * MAX_DELETE_FRACTION:
+        return (f"{len(diff['removed']):,} of {manifest_chunk_count:,} chunks would be deleted "
+                f"(limit {MAX_DELETE_FRACTION:.0%})")
+
+    return None
+
+def generate_embeddings_batch(documents, batch_size=100):
+    """Generate embeddings for documents in batches"""
+
+    if not documents:
+        return []
+
+    model = get_embedding_model()
+    print(f"Generating embeddings for {len(documents):,} chunks...")
+
+    embeddings_data = []
+
+    for i in range(0, len(documents), batch_size):
+        batch = documents[i:i + batch_size]
+        batch_embeddings = model.encode([doc['content'] for doc in batch], show_progress_bar=False)
+
+        for j, doc in enumerate(batch):
+            embeddings_data.append({**doc, 'embedding': batch_embeddings[j].tolist()})
+
+    return embeddings_data
+
+def to_dynamodb_item(embedding_record):
+    """Convert an embedding record to the MedicalEmbeddings item layout"""
+    return {
+        'chunk_id': embedding_record['chunk_id'],
+        'doc_id': embedding_record['doc_id'],
+        'section': embedding_record['section'],
+        'title': embedding_record['title'],
+        'content': embedding_record['content'][:MAX_CONTENT_LENGTH],
+        'url': embedding_record['url'],
+        'content_hash': embedding_record['content_hash'],
+        'embedding': [Decimal(str(float(x))) for x in embedding_record['embedding']]
+    }
+
+def write_shard(put_items, delete_chunk_ids):
+    """
+    Write one shard with batch_writer. batch_writer re-sends UnprocessedItems itself;
+    throttling errors that still escape are retried here with exponential backoff.
+    """
+
+    table = get_thread_table(EMBEDDINGS_TABLE)
+
+    for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+        try:
+            with table.batch_writer(overwrite_by_pkeys=['chunk_id']) as batch_writer:
+                for item in put_items:
+                    batch_writer.put_item(Item=item)
+                for chunk_id in delete_chunk_ids:
+                    batch_writer.delete_item(Key={'chunk_id': chunk_id})
+            return True
+
+        except Exception as e:
+            if attempt == MAX_WRITE_ATTEMPTS:
+                print(f" Shard failed after {attempt} attempts: {str(e)}")
+                return False
+            delay = min(2 ** attempt * 0.1, 5)
+            print(f" Shard write error (attempt {attempt}), retrying in {delay:.1f}s: {str(e)}")
+            time.sleep(delay)
+
+def parallel_write(put_items, delete_chunk_ids, workers=8, shard_size=100):
+    """Fan puts and deletes out across a thread pool; returns the chunk_ids that failed"""
+
+    shards = []
+    for i in range(0, len(put_items), shard_size):
+        shards.append((put_items[i:i + shard_size], []))
+    for i in range(0, len(delete_chunk_ids), shard_size):
+        shards.append(([], delete_chunk_ids[i:i + shard_size]))
+
+    if not shards:
+        return set()
+
+    print(f"Writing {len(put_items):,} puts and {len(delete_chunk_ids):,} deletes in {len(shards)} shards ({workers} workers)...")
+
+    failed_chunk_ids = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(write_shard, puts, deletes): (puts, deletes) for puts, deletes in shards}
+
+        for future in as_completed(futures):
+            puts, deletes = futures[future]
+            if not future.result():
+                failed_chunk_ids.update(item['chunk_id'] for item in puts)
+                failed_chunk_ids.update(deletes)
+
+    return failed_chunk_ids
+
+def build_updated_manifest(chunks, manifest, failed_chunk_ids):
+    """
+    Build the manifest that matches what is now in MedicalEmbeddings. Failed chunks keep
+    their previous hash (or none) so the next run picks them up again.
+    """
+
+    previous_hashes = {}
+    previous_doc_ids = {}
+    for doc_id, hashes in manifest.items():
+        for chunk_id, content_hash in hashes.items():
+            previous_hashes[chunk_id] = content_hash
+            previous_doc_ids[chunk_id] = doc_id
+
+    updated_manifest = {}
+
+    for chunk in chunks:
+        chunk_id = chunk['chunk_id']
+        if chunk_id in failed_chunk_ids:
+            content_hash = previous_hashes.get(chunk_id)
+        else:
+            content_hash = chunk['content_hash']
+        if content_hash is not None:
+            updated_manifest.setdefault(chunk['doc_id'], {})[chunk_id] = content_hash
+
+    for chunk_id in failed_chunk_ids:
+        if chunk_id in previous_doc_ids and chunk_id not in updated_manifest.get(previous_doc_ids[chunk_id], {}):
+            updated_manifest.setdefault(previous_doc_ids[chunk_id], {})[chunk_id] = previous_hashes[chunk_id]
+
+    return updated_manifest
+
+def save_manifest(manifest, updated_manifest):
+    """Write only the DocumentMetadata entries whose chunk hashes changed, retrying like write_shard"""
+
+    table = get_thread_table(METADATA_TABLE)
+    timestamp = int(time.time())
+
+    changed_doc_ids = [doc_id for doc_id, hashes in updated_manifest.items() if manifest.get(doc_id) != hashes]
+    removed_doc_ids = [doc_id for doc_id in manifest if doc_id not in updated_manifest]
+
+    for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+        try:
+            with table.batch_writer(overwrite_by_pkeys=['document_id']) as batch_writer:
+                for doc_id in changed_doc_ids:
+                    batch_writer.put_item(Item={
+                        'document_id': doc_id,
+                        'chunk_hashes': updated_manifest[doc_id],
+                        'updated_at': timestamp
+                    })
+                for doc_id in removed_doc_ids:
+                    batch_writer.delete_item(Key={'document_id': doc_id})
+            break
+
+        except Exception as e:
+            if attempt == MAX_WRITE_ATTEMPTS:
+                print(f" Manifest write failed after {attempt} attempts: {str(e)}")
+                raise
+            delay = min(2 ** attempt * 0.1, 5)
+            print(f" Manifest write error (attempt {attempt}), retrying in {delay:.1f}s: {str(e)}")
+            time.sleep(delay)
+
+    print(f"Manifest updated: {len(changed_doc_ids):,} documents written, {len(removed_doc_ids):,} removed")
+
+def bump_corpus_version(run_summary):
+    """Increment the corpus version that the Lambda folds into its cache keys"""
+
+    table = get_thread_table(METADATA_TABLE)
+    response = table.update_item(
+        Key={'document_id': CORPUS_VERSION_DOCUMENT_ID},
+        UpdateExpression='ADD #version :one SET updated_at = :now, last_run = :summary',
+        ExpressionAttributeNames={'#version': 'version'},
+        ExpressionAttributeValues={
+            ':one': 1,
+            ':now': int(time.time()),
+            ':summary': run_summary
+        },
+        ReturnValues='UPDATED_NEW'
+    )
+    return int(response['Attributes']['version'])
+
+def run_incremental_ingest(articles, workers=8, shard_size=100, embed_batch_size=100, dry_run=False,
+                           allow_mass_delete=False):
+    """Diff the corpus against the manifest and apply only the changes"""
+
+    start_time = time.time()
+
+    chunks = build_section_chunks(articles)
+    for chunk in chunks:
+        chunk['content_hash'] = compute_chunk_hash(chunk)
+
+    manifest = load_manifest()
+    diff = diff_against_manifest(chunks, manifest)
+
+    run_summary = {
+        'new': len(diff['new']),
+        'changed': len(diff['changed']),
+        'removed': len(diff['removed']),
+        'unchanged': diff['unchanged_count']
+    }
+    print(f"Diff: {run_summary['new']:,} new, {run_summary['changed']:,} changed, "
+          f"{run_summary['removed']:,} removed, {run_summary['unchanged']:,} unchanged")
+
+    mass_delete_reason = check_mass_delete(chunks, diff, manifest)
+    if mass_delete_reason:
+        print(f"Mass delete guard: {mass_delete_reason}")
+
+    if dry_run:
+        print("Dry run - no embeddings generated, nothing written")
+        return {**run_summary, 'failed': 0, 'corpus_version': None}
+
+    if mass_delete_reason and not allow_mass_delete:
+        print("Refusing to apply changes; re-run with --allow-mass-delete if this is intended")
+        return {**run_summary, 'failed': 0, 'corpus_version': None, 'refused': True}
+
+    if not (diff['new'] or diff['changed'] or diff['removed']):
+        print(f"Corpus is up to date ({time.time() - start_time:.1f}s)")
+        return {**run_summary, 'failed': 0, 'corpus_version': None}
+
+    embeddings_data = generate_embeddings_batch(diff['new'] + diff['changed'], batch_size=embed_batch_size)
+    put_items = [to_dynamodb_item(record) for record in embeddings_data]
+
+    failed_chunk_ids = parallel_write(put_items, diff['removed'], workers=workers, shard_size=shard_size)
+    if failed_chunk_ids:
+        print(f"{len(failed_chunk_ids):,} chunks failed to write and will be retried on the next run")
+
+    run_summary['failed'] = len(failed_chunk_ids)
+    writes_landed = len(failed_chunk_ids) < len(put_items) + len(diff['removed'])
+    corpus_version = None
+
+    try:
+        updated_manifest = build_updated_manifest(chunks, manifest, failed_chunk_ids)
+        save_manifest(manifest, updated_manifest)
+    finally:
+        # MedicalEmbeddings already changed, so the Lambda must see a new version even
+        # if the manifest write failed; the next run just re-diffs those chunks.
+        if writes_landed:
+            corpus_version = bump_corpus_version(run_summary)
+
+    print(f"Ingestion complete in {time.time() - start_time:.1f}s - corpus version {corpus_version}")
+    return {**run_summary, 'corpus_version': corpus_version}
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally sync medical articles into DynamoDB')
+    parser.add_argument('--input', help='Local all_articles.json (defaults to reading from S3)')
+    parser.add_argument('--bucket', default=DEFAULT_BUCKET, help='S3 bucket with the raw articles')
+    parser.add_argument('--key', default=DEFAULT_KEY, help='S3 key of the combined articles file')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel DynamoDB writer threads')
+    parser.add_argument('--shard-size', type=int, default=100, help='Items per writer shard')
+    parser.add_argument('--embed-batch-size', type=int, default=100, help='Chunks per embedding batch')
+    parser.add_argument('--dry-run', action='store_true', help='Only report the diff')
+    parser.add_argument('--allow-mass-delete', action='store_true',
+                        help='Apply the diff even if the input is empty or removes more than 10%% of the manifest')
+    args = parser.parse_args()
+
+    with open_articles(args.input, args.bucket, args.key) as stream:
+        result = run_incremental_ingest(
+            iter_json_array(stream),
+            workers=args.workers,
+            shard_size=args.shard_size,
+            embed_batch_size=args.embed_batch_size,
+            dry_run=args.dry_run,
+            allow_mass_delete=args.allow_mass_delete
+        )
+
+    if result.get('failed') or result.get('refused'):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
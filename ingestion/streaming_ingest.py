@@ -0,0 +1,152 @@
+"""
+Bounded-memory embedding export for raw article dumps.
+
+Articles are parsed one at a time from all_articles.json, turned into section
+chunks by a generator, embedded in fixed-size batches and appended to the
+output as each batch finishes. Nothing holds the whole corpus, so peak memory
+depends on the batch size rather than on the number of articles.
+
+Output formats:
+    jsonl   <output>.jsonl      one chunk per line, embedding included
+    binary  <output>.f32        float32 embedding rows, little-endian
+            <output>.meta.jsonl one chunk per line with its row number
+
+Usage:
+    python streaming_ingest.py --input all_articles.json --output /tmp/medical_embeddings
+    python streaming_ingest.py --format binary --upload-bucket medical-rag-processed-b01015847
+"""
+
+import argparse
+import json
+import os
+import resource
+import time
+
+import boto3
+
+from chunking import compute_chunk_hash, iter_json_array, iter_section_chunks
+from incremental_ingest import DEFAULT_BUCKET, DEFAULT_KEY, get_embedding_model, open_articles
+
+class JsonlEmbeddingWriter:
+    """Append chunks with their embeddings as JSON lines"""
+
+    def __init__(self, output_prefix):
+        self.paths = [f"{output_prefix}.jsonl"]
+        self.file = open(self.paths[0], 'w', encoding='utf-8')
+        self.count = 0
+
+    def write_batch(self, chunks, embeddings):
+        for chunk, embedding in zip(chunks, embeddings):
+            self.file.write(json.dumps({**chunk, 'embedding': embedding.tolist()}, ensure_ascii=False))
+            self.file.write('\n')
+        self.count += len(chunks)
+
+    def close(self):
+        self.file.close()
+
+class BinaryEmbeddingWriter:
+    """Append float32 embedding rows to a raw matrix file plus a JSON lines index"""
+
+    def __init__(self, output_prefix):
+        self.paths = [f"{output_prefix}.f32", f"{output_prefix}.meta.jsonl"]
+        self.matrix_file = open(self.paths[0], 'wb')
+        self.meta_file = open(self.paths[1], 'w', encoding='utf-8')
+        self.count = 0
+
+    def write_batch(self, chunks, embeddings):
+        self.matrix_file.write(embeddings.astype('<f4').tobytes())
+        for chunk in chunks:
+            self.meta_file.write(json.dumps({**chunk, 'row': self.count}, ensure_ascii=False))
+            self.meta_file.write('\n')
+            self.count += 1
+
+    def close(self):
+        self.matrix_file.close()
+        self.meta_file.close()
+
+OUTPUT_WRITERS = {
+    'jsonl': JsonlEmbeddingWriter,
+    'binary': BinaryEmbeddingWriter
+}
+
+def iter_batches(items, batch_size):
+    """Group any iterable into lists of at most batch_size"""
+
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_embedded_batches(chunks, batch_size=100):
+    """Embed a chunk stream in fixed-size batches, yielding (chunks, embedding matrix)"""
+
+    model = get_embedding_model()
+
+    for batch in iter_batches(chunks, batch_size):
+        embeddings = model.encode([chunk['content'] for chunk in batch], show_progress_bar=False, convert_to_numpy=True)
+        yield batch, embeddings
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def stream_embeddings_to_file(articles, output_prefix, output_format='jsonl', batch_size=100):
+    """Chunk, embed and write the corpus one batch at a time"""
+
+    start_time = time.time()
+    writer = OUTPUT_WRITERS[output_format](output_prefix)
+
+    try:
+        chunks = iter_section_chunks(articles)
+        for batch, embeddings in iter_embedded_batches(chunks, batch_size=batch_size):
+            for chunk in batch:
+                chunk['content_hash'] = compute_chunk_hash(chunk)
+            writer.write_batch(batch, embeddings)
+
+            if writer.count % 1000 < len(batch):
+                print(f"  Wrote {writer.count:,} chunks (peak RSS {peak_rss_mb():.0f} MB)")
+    finally:
+        writer.close()
+
+    print(f"Wrote {writer.count:,} chunks to {', '.join(writer.paths)} in {time.time() - start_time:.1f}s "
+          f"(peak RSS {peak_rss_mb():.0f} MB)")
+    return writer.paths
+
+def upload_outputs(paths, bucket, key_prefix=''):
+    """Upload finished output files; upload_file streams from disk in multipart chunks"""
+
+    s3 = boto3.client('s3')
+    for path in paths:
+        key = f"{key_prefix}{os.path.basename(path)}"
+        s3.upload_file(path, bucket, key)
+        print(f"Uploaded {path} to s3://{bucket}/{key}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream medical articles into an embeddings file')
+    parser.add_argument('--input', help='Local all_articles.json (defaults to reading from S3)')
+    parser.add_argument('--bucket', default=DEFAULT_BUCKET, help='S3 bucket with the raw articles')
+    parser.add_argument('--key', default=DEFAULT_KEY, help='S3 key of the combined articles file')
+    parser.add_argument('--output', default='/tmp/medical_embeddings', help='Output path without extension')
+    parser.add_argument('--format', choices=sorted(OUTPUT_WRITERS), default='jsonl', help='Output format')
+    parser.add_argument('--batch-size', type=int, default=100, help='Chunks per embedding batch')
+    parser.add_argument('--upload-bucket', help='Upload the output files to this S3 bucket when done')
+    parser.add_argument('--upload-prefix', default='', help='Key prefix for uploaded files')
+    args = parser.parse_args()
+
+    with open_articles(args.input, args.bucket, args.key) as stream:
+        paths = stream_embeddings_to_file(
+            iter_json_array(stream),
+            args.output,
+            output_format=args.format,
+            batch_size=args.batch_size
+        )
+
+    if args.upload_bucket:
+        upload_outputs(paths, args.upload_bucket, args.upload_prefix)
+
+if __name__ == '__main__':
+    main()
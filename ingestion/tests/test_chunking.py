@@ -0,0 +1,61 @@
+import io
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunking import iter_json_array, iter_section_chunks
+
+READ_SIZES = [1, 2, 3, 5, 7, 16, 64, 1 << 16]
+
+def random_value(rng, depth=0):
+    kind = rng.choice(['int', 'float', 'exp', 'str', 'bool', 'null', 'list', 'dict'] if depth < 2 else ['int', 'float', 'str'])
+    if kind == 'int':
+        return rng.randint(-10 ** 6, 10 ** 6)
+    if kind == 'float':
+        return round(rng.uniform(-1000, 1000), rng.randint(0, 6))
+    if kind == 'exp':
+        return rng.choice([1.5e3, -2.25e-7, 6.02e23, 1.0, 0.5])
+    if kind == 'str':
+        return ''.join(rng.choice('ab é"\\\\],[{}\\n') for _ in range(rng.randint(0, 12)))
+    if kind == 'bool':
+        return rng.choice([True, False])
+    if kind == 'null':
+        return None
+    if kind == 'list':
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {f'k{i}': random_value(rng, depth + 1) for i in range(rng.randint(0, 4))}
+
+@pytest.mark.parametrize('read_size', READ_SIZES)
+def test_iter_json_array_round_trips_random_arrays(read_size):
+    rng = random.Random(read_size)
+    for _ in range(100):
+        data = [random_value(rng) for _ in range(rng.randint(0, 8))]
+        text = json.dumps(data, indent=rng.choice([None, 2]), ensure_ascii=rng.choice([True, False]))
+        assert list(iter_json_array(io.StringIO(text), read_size=read_size)) == data
+
+@pytest.mark.parametrize('text, read_size', [('[1.5e3]', 3), ('[1.0]', 1), ('[12, 3e-2 ]', 4)])
+def test_iter_json_array_numbers_split_at_read_boundary(text, read_size):
+    assert list(iter_json_array(io.StringIO(text), read_size=read_size)) == json.loads(text)
+
+def test_iter_json_array_single_object_and_empty_input():
+    assert list(iter_json_array(io.StringIO(' {"name": "Asthma"} '), read_size=2)) == [{'name': 'Asthma'}]
+    assert list(iter_json_array(io.StringIO(''))) == []
+
+def test_iter_json_array_truncated_input_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"name": "Asthma"}, {"na'), read_size=4))
+
+def test_iter_section_chunks_skips_duplicates():
+    articles = [
+        {'name': 'Diabetes', 'overview': 'a', 'treatment': 'b', 'url': 'u'},
+        {'name': 'Diabetes', 'overview': 'duplicate'},
+        'not an article'
+    ]
+    chunks = list(iter_section_chunks(articles))
+    assert [chunk['chunk_id'] for chunk in chunks] == ['diabetes_overview', 'diabetes_treatment']
+    assert chunks[0]['content'] == 'a'
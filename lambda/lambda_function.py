@@ -1,12 +1,21 @@
+import time
+_import_started = time.perf_counter()
+
 import json
 import boto3
+import base64
+import gzip
 import hashlib
-import time
 import requests
 import os
 import re
 from decimal import Decimal
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 class DecimalEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, Decimal):
@@ -16,38 +25,228 @@ class DecimalEncoder(json.JSONEncoder):
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-dynamodb = boto3.resource('dynamodb')
-embeddings_table = dynamodb.Table('MedicalEmbeddings')
-cache_table = dynamodb.Table('QueryCache')
+# 0 leaves compression to API Gateway (minimumCompressionSize); Lambda-side compression
+# returns base64 bodies and needs binaryMediaTypes configured on a REST API.
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '0'))
 
-cloudwatch = boto3.client('cloudwatch')
+RESPONSE_VIEWS = {
+    'full': (None, None),
+    'compact': (
+        {'query', 'generated_response', 'sources', 'total_results', 'cached', 'timestamp'},
+        {'score', 'title', 'section', 'url', 'chunk_id'}
+    ),
+    'answer': ({'query', 'generated_response', 'cached'}, None)
+}
+FIELD_ALIASES = {'answer': 'generated_response'}
+RESPONSE_FIELDS = {
+    'query', 'generated_response', 'sources', 'total_results', 'method', 'search_strategy',
+    'response_type', 'llm_enhancement', 'debug_info', 'cached', 'timestamp'
+}
+SOURCE_FIELDS = {'score', 'title', 'section', 'content', 'url', 'chunk_id', 'matched_terms', 'relevance_type'}
+ERROR_RESPONSE_TYPES = {'system_error', 'error'}
 
-def create_response(status_code, body):
-    """Create API response"""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-            'Cache-Control': 'no-cache' if status_code != 200 else 'max-age=300'
-        },
-        'body': json.dumps(body, cls=DecimalEncoder, ensure_ascii=False)
+EMBEDDINGS_TABLE = 'MedicalEmbeddings'
+CACHE_TABLE = 'QueryCache'
+METADATA_TABLE = 'DocumentMetadata'
+
+CORPUS_VERSION_DOCUMENT_ID = '__corpus_version__'
+CORPUS_VERSION_REFRESH_SECONDS = int(os.environ.get('CORPUS_VERSION_REFRESH_SECONDS', '60'))
+CORPUS_MAX_AGE_SECONDS = int(os.environ.get('CORPUS_MAX_AGE_SECONDS', '900'))
+_corpus_version = {'value': 0, 'checked_at': 0}
+_corpus = {'items': None, 'version': None, 'loaded_at': 0, 'retry_after': 0, 'spelling_index': None}
+
+SPELLING_MAX_EDIT_DISTANCE = 2
+SPELLING_PREFIX_LENGTH = 7
+SPELLING_MIN_WORD_LENGTH = 4
+SPELLING_TITLE_BOOST = 1000
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+WARM_ON_INIT = os.environ.get('WARM_ON_INIT', 'true').lower() == 'true'
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', '1500'))
+_startup = {'import_ms': 0, 'init_stages_ms': {}}
+_cold_start = True
+
+_clients = {}
+
+def get_dynamodb():
+    """DynamoDB resource, created on first use"""
+    if 'dynamodb' not in _clients:
+        _clients['dynamodb'] = boto3.resource('dynamodb')
+    return _clients['dynamodb']
+
+def get_table(table_name):
+    """DynamoDB Table object, created on first use"""
+    key = f"table:{table_name}"
+    if key not in _clients:
+        _clients[key] = get_dynamodb().Table(table_name)
+    return _clients[key]
+
+def get_cloudwatch():
+    """CloudWatch client, created on first use since only metrics need it"""
+    if 'cloudwatch' not in _clients:
+        _clients['cloudwatch'] = boto3.client('cloudwatch')
+    return _clients['cloudwatch']
+
+def create_response(status_code, body, etag=None, accept_encoding='', cacheable=True):
+    """Create API response, compressing large bodies when the client accepts it"""
+
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, Authorization, If-None-Match',
+        'Access-Control-Expose-Headers': 'ETag',
+        'Cache-Control': 'max-age=300' if status_code in (200, 304) and cacheable else 'no-cache'
     }
+    if etag:
+        headers['ETag'] = etag
+
+    if status_code == 304:
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+
+    body_text = json.dumps(body, cls=DecimalEncoder, ensure_ascii=False, separators=(',', ':'))
+    response = {'statusCode': status_code, 'headers': headers, 'body': body_text}
+
+    encoding = choose_content_encoding(accept_encoding) if COMPRESSION_MIN_BYTES > 0 else None
+    if encoding:
+        headers['Vary'] = 'Accept-Encoding'
+        body_bytes = body_text.encode('utf-8')
+        if len(body_bytes) >= COMPRESSION_MIN_BYTES:
+            if encoding == 'br':
+                compressed = brotli.compress(body_bytes, quality=5)
+            else:
+                compressed = gzip.compress(body_bytes, compresslevel=6)
+            headers['Content-Encoding'] = encoding
+            response['body'] = base64.b64encode(compressed).decode('ascii')
+            response['isBase64Encoded'] = True
+
+    return response
+
+def choose_content_encoding(accept_encoding):
+    """Pick br or gzip from an Accept-Encoding header, ignoring q-values of 0"""
+
+    accepted = set()
+    for part in (accept_encoding or '').lower().split(','):
+        coding, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        quality = 1.0
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip())
+
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+def get_header(event, name):
+    """Case-insensitive request header lookup (REST and HTTP APIs differ in casing)"""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def parse_field_list(value, valid_fields, option_name):
+    """
+    Accept either a comma separated string or a list of field names. An empty selection
+    means no selection; unknown or non-string names raise ValueError.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list) or not all(isinstance(field, str) for field in value):
+        raise ValueError(f"{option_name} must be a comma separated string or a list of field names")
+
+    fields = {FIELD_ALIASES.get(field.strip(), field.strip()) for field in value if field.strip()}
+    if not fields:
+        return None
+
+    unknown = sorted(fields - valid_fields)
+    if unknown:
+        raise ValueError(f"Unknown {option_name}: {', '.join(unknown)}")
+    return fields
+
+def parse_response_options(params):
+    """Resolve view/fields/source_fields request options into field sets (None means all)"""
+
+    view = str(params.get('view', 'full')).lower()
+    fields, source_fields = RESPONSE_VIEWS.get(view, RESPONSE_VIEWS['full'])
+
+    requested_fields = parse_field_list(params.get('fields'), RESPONSE_FIELDS, 'fields')
+    if requested_fields is not None:
+        fields = requested_fields
+
+    requested_source_fields = parse_field_list(params.get('source_fields'), SOURCE_FIELDS, 'source_fields')
+    if requested_source_fields is not None:
+        source_fields = requested_source_fields
+
+    return {'fields': fields, 'source_fields': source_fields}
+
+def select_response_fields(response_data, options):
+    """Drop the fields the client did not ask for before serializing"""
+
+    fields = options['fields']
+    source_fields = options['source_fields']
+
+    if fields is not None:
+        response_data = {k: v for k, v in response_data.items() if k in fields}
+
+    if source_fields is not None and 'sources' in response_data:
+        response_data['sources'] = [
+            {k: v for k, v in source.items() if k in source_fields}
+            for source in response_data['sources']
+        ]
+
+    return response_data
+
+def build_etag(query_hash, cache_timestamp, options):
+    """Weak ETag from the versioned query key, the cache entry's timestamp and the selected fields"""
+    selection = json.dumps(
+        [sorted(options['fields'] or []), sorted(options['source_fields'] or []),
+         options['fields'] is None, options['source_fields'] is None]
+    )
+    digest = hashlib.md5(f"{query_hash}:{cache_timestamp}:{selection}".encode()).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header against our ETag, using weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return any(tag.replace('W/', '', 1) == etag.replace('W/', '', 1) for tag in tags)
 
 def lambda_handler(event, context):
     """
     Enhanced Medical RAG System with Prioritized Groq Integration
     """
     
+    global _cold_start
+    cold_start = _cold_start
+    _cold_start = False
+
     try:
+        if is_prewarm_event(event):
+            return handle_prewarm(cold_start)
+
         if 'queryStringParameters' in event and event['queryStringParameters']:
-            query = event['queryStringParameters'].get('q', '')
+            params = event['queryStringParameters']
+            query = params.get('q', '')
         elif 'body' in event:
-            body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
-            query = body.get('query', '')
+            raw_body = event['body']
+            if raw_body and event.get('isBase64Encoded'):
+                raw_body = base64.b64decode(raw_body).decode('utf-8')
+            params = (json.loads(raw_body) if isinstance(raw_body, str) else raw_body) or {}
+            query = params.get('query', '')
         else:
+            params = event
             query = event.get('query', '')
         
         if not query or not query.strip():
@@ -59,13 +258,43 @@ def lambda_handler(event, context):
         query = query.strip()
         print(f"Processing medical query: {query}")
         
-        query_hash = hashlib.md5(query.lower().encode()).hexdigest()
+        corpus_version = get_corpus_version()
+        query_hash = hashlib.md5(f"v{corpus_version}:{query.lower()}".encode()).hexdigest()
         print(f"Generated query hash: {query_hash}")
+
+        try:
+            response_options = parse_response_options(params)
+        except ValueError as option_error:
+            return create_response(400, {
+                'error': 'Invalid field selection',
+                'message': str(option_error),
+                'valid_fields': sorted(RESPONSE_FIELDS | set(FIELD_ALIASES)),
+                'valid_source_fields': sorted(SOURCE_FIELDS)
+            })
+        accept_encoding = get_header(event, 'accept-encoding')
         
         cached_result = check_cache(query_hash)
         if cached_result:
+            cacheable = cached_result.get('response_type') not in ERROR_RESPONSE_TYPES
+            etag = None
+            if cacheable and cached_result.get('timestamp'):
+                etag = build_etag(query_hash, cached_result['timestamp'], response_options)
+                if etag_matches(get_header(event, 'if-none-match'), etag):
+                    print("ETag matched, returning 304")
+                    return create_response(304, None, etag=etag)
+
             print("Returning cached result")
-            return create_response(200, {**cached_result, 'cached': True})
+            return create_response(
+                200,
+                select_response_fields({
+                    **cached_result,
+                    'cached': True,
+                    'debug_info': {**cached_result.get('debug_info', {}), 'cold_start': cold_start}
+                }, response_options),
+                etag=etag,
+                accept_encoding=accept_encoding,
+                cacheable=cacheable
+            )
         
         print("No cached result found, proceeding with fresh search")
 
@@ -82,27 +311,42 @@ def lambda_handler(event, context):
             'search_strategy': search_results['strategy'],
             'response_type': search_results['response_type'],
             'llm_enhancement': search_results['llm_enhancement'],
-            'debug_info': search_results['debug_info'],
+            'debug_info': {**search_results['debug_info'], 'corpus_version': corpus_version},
             'cached': False,
             'timestamp': int(time.time())
         }
 
+        cacheable = response_data['response_type'] not in ERROR_RESPONSE_TYPES
+        etag = build_etag(query_hash, response_data['timestamp'], response_options) if cacheable else None
+
         print(f"About to attempt caching...")
         try:
-            cache_success = cache_result(query_hash, query, response_data)
-            print(f"Cache result returned: {cache_success}")
-            if cache_success:
-                print("Result cached successfully")
-                response_data['debug_info']['cache_status'] = 'success'
+            if not cacheable:
+                print("Error response - not caching")
+                response_data['debug_info']['cache_status'] = 'skipped'
             else:
-                print("Caching failed - adding to debug info")
-                response_data['debug_info']['cache_status'] = 'failed'
+                cache_success = cache_result(query_hash, query, response_data)
+                print(f"Cache result returned: {cache_success}")
+                if cache_success:
+                    print("Result cached successfully")
+                    response_data['debug_info']['cache_status'] = 'success'
+                else:
+                    print("Caching failed - adding to debug info")
+                    response_data['debug_info']['cache_status'] = 'failed'
         except Exception as cache_error:
             print(f"Exception in cache_result call: {str(cache_error)}")
             response_data['debug_info']['cache_status'] = 'exception'
             response_data['debug_info']['cache_exception'] = str(cache_error)
+
+        response_data['debug_info']['cold_start'] = cold_start
         
-        return create_response(200, response_data)
+        return create_response(
+            200,
+            select_response_fields(response_data, response_options),
+            etag=etag,
+            accept_encoding=accept_encoding,
+            cacheable=cacheable
+        )
         
     except Exception as e:
         print(f"Lambda error: {str(e)}")
@@ -120,14 +364,18 @@ def enhanced_medical_rag_search(query, top_k=8):
     start_time = time.time()
     
     try:
-        all_medical_data = load_all_database_content()
+        all_medical_data = get_corpus()
         
         if not all_medical_data:
             return create_no_content_response(query)
         
         print(f"Loaded {len(all_medical_data)} medical items from database")
 
-        search_info = extract_smart_search_terms(query.lower())
+        corrected_query, spelling_corrections = correct_query_spelling(query.lower(), _corpus['spelling_index'])
+        if spelling_corrections:
+            print(f"Spelling corrections: {spelling_corrections}")
+
+        search_info = extract_smart_search_terms(corrected_query)
         
         print(f"Search analysis:")
         print(f" Primary terms: {search_info['primary_terms']}")  
@@ -177,6 +425,7 @@ def enhanced_medical_rag_search(query, top_k=8):
                 'search_time': round(search_time, 2),
                 'primary_terms': search_info['primary_terms'],
                 'intent': search_info['intent'],
+                'spelling_corrections': spelling_corrections,
                 'groq_attempted': GROQ_API_KEY is not None,
                 'groq_api_available': bool(GROQ_API_KEY),
                 'optimized_system': True
@@ -309,6 +558,191 @@ def build_structured_medical_response(query, results, search_info):
     
     return ''.join(response_parts)
 
+def get_corpus_version():
+    """Get the corpus version written by the ingestion pipeline, re-read at most once per refresh window"""
+
+    now = time.time()
+    if now - _corpus_version['checked_at'] < CORPUS_VERSION_REFRESH_SECONDS:
+        return _corpus_version['value']
+
+    try:
+        response = get_table(METADATA_TABLE).get_item(
+            Key={'document_id': CORPUS_VERSION_DOCUMENT_ID},
+            ProjectionExpression='#version',
+            ExpressionAttributeNames={'#version': 'version'}
+        )
+        version = int(response.get('Item', {}).get('version', 0))
+        if version != _corpus_version['value']:
+            print(f"Corpus version changed: {_corpus_version['value']} -> {version}")
+        _corpus_version['value'] = version
+    except Exception as e:
+        print(f"Corpus version check FAILED: {str(e)}")
+
+    _corpus_version['checked_at'] = now
+    return _corpus_version['value']
+
+def get_corpus():
+    """
+    Return the in-memory corpus index, reloading it when the corpus version changes or the
+    index is older than CORPUS_MAX_AGE_SECONDS (uploads that don't bump the version).
+    A failed reload is retried at most once per CORPUS_VERSION_REFRESH_SECONDS.
+    """
+
+    version = get_corpus_version()
+    now = time.time()
+    corpus_age = now - _corpus['loaded_at']
+    if _corpus['items'] is not None and _corpus['version'] == version and corpus_age < CORPUS_MAX_AGE_SECONDS:
+        return _corpus['items']
+    if now < _corpus['retry_after']:
+        return _corpus['items'] or []
+
+    items = load_all_database_content()
+    if not items:
+        _corpus['retry_after'] = now + CORPUS_VERSION_REFRESH_SECONDS
+        if _corpus['items']:
+            print(f"Corpus reload failed, serving stale corpus version {_corpus['version']} "
+                  f"({len(_corpus['items'])} items); retrying in {CORPUS_VERSION_REFRESH_SECONDS}s")
+        else:
+            print(f"Corpus load failed, no corpus available; retrying in {CORPUS_VERSION_REFRESH_SECONDS}s")
+        return _corpus['items'] or []
+
+    _corpus['items'] = build_corpus_index(items)
+    _corpus['spelling_index'] = build_spelling_index(_corpus['items'])
+    _corpus['version'] = version
+    _corpus['loaded_at'] = time.time()
+    return _corpus['items']
+
+def build_corpus_index(items):
+    """Precompute lowercase search fields once per corpus load instead of on every query"""
+    for item in items:
+        item['title_lower'] = item.get('title', '').lower()
+        item['section_lower'] = item.get('section', '').lower()
+        item['content_lower'] = item.get('content', '').lower()
+    return items
+
+def generate_deletes(word, max_distance):
+    """All strings reachable from word by deleting up to max_distance characters"""
+
+    deletes = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for candidate in frontier:
+            if len(candidate) <= 1:
+                continue
+            for i in range(len(candidate)):
+                next_frontier.add(candidate[:i] + candidate[i + 1:])
+        next_frontier -= deletes
+        deletes |= next_frontier
+        frontier = next_frontier
+    return deletes
+
+def build_spelling_index(items):
+    """
+    SymSpell-style delete dictionary over title and section vocabulary. Lookups only
+    generate deletes of the query term, so cost does not grow with the vocabulary.
+    Every word seen anywhere in the corpus is "known" and never corrected.
+    """
+
+    start_time = time.time()
+    known_words = set()
+    frequencies = {}
+
+    for item in items:
+        title_words = WORD_PATTERN.findall(item.get('title_lower', ''))
+        section_words = WORD_PATTERN.findall(item.get('section_lower', ''))
+        for word in title_words:
+            frequencies[word] = frequencies.get(word, 0) + SPELLING_TITLE_BOOST
+        for word in section_words:
+            frequencies[word] = frequencies.get(word, 0) + 1
+        known_words.update(title_words)
+        known_words.update(section_words)
+        known_words.update(WORD_PATTERN.findall(item.get('content_lower', '')))
+
+    deletes = {}
+    for word in frequencies:
+        if len(word) < SPELLING_MIN_WORD_LENGTH:
+            continue
+        prefix = word[:SPELLING_PREFIX_LENGTH]
+        for deleted in generate_deletes(prefix, SPELLING_MAX_EDIT_DISTANCE) | {prefix}:
+            deletes.setdefault(deleted, []).append(word)
+
+    print(f"Built spelling index: {len(frequencies)} terms, {len(deletes)} deletes, "
+          f"{len(known_words)} known words in {time.time() - start_time:.2f}s")
+
+    return {
+        'known_words': known_words,
+        'frequencies': frequencies,
+        'deletes': deletes
+    }
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, returning max_distance + 1 once it is exceeded"""
+
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    return previous[-1]
+
+def lookup_spelling(term, spelling_index):
+    """Return the closest, most frequent title/section term for an unknown word, or None"""
+
+    if len(term) < SPELLING_MIN_WORD_LENGTH or term in spelling_index['known_words']:
+        return None
+
+    max_distance = 1 if len(term) <= 5 else SPELLING_MAX_EDIT_DISTANCE
+    prefix = term[:SPELLING_PREFIX_LENGTH]
+    frequencies = spelling_index['frequencies']
+
+    best = None
+    checked = set()
+    for deleted in generate_deletes(prefix, max_distance) | {prefix}:
+        for word in spelling_index['deletes'].get(deleted, ()):
+            if word in checked:
+                continue
+            checked.add(word)
+            distance = edit_distance(term, word, max_distance)
+            if distance > max_distance:
+                continue
+            candidate = (distance, -frequencies[word], word)
+            if best is None or candidate < best:
+                best = candidate
+
+    return best[2] if best else None
+
+def correct_query_spelling(query_lower, spelling_index):
+    """Replace misspelled words in the query, returning the new query and {original: corrected}"""
+
+    if not spelling_index:
+        return query_lower, {}
+
+    corrections = {}
+
+    def replace(match):
+        word = match.group(0)
+        if word not in corrections:
+            corrected = lookup_spelling(word, spelling_index)
+            if not corrected:
+                return word
+            corrections[word] = corrected
+        return corrections[word]
+
+    return WORD_PATTERN.sub(replace, query_lower), corrections
+
 def load_all_database_content():
     """Load ALL content from database efficiently"""
     
@@ -317,6 +751,7 @@ def load_all_database_content():
     try:
         print("Loading all database content...")
         
+        embeddings_table = get_table(EMBEDDINGS_TABLE)
         response = embeddings_table.scan(
             ProjectionExpression='chunk_id, title, #section, content, #url',
             ExpressionAttributeNames={
@@ -405,9 +840,9 @@ def enhanced_python_scoring(all_items, search_info):
     
     for item in all_items:
         try:
-            title = item.get('title', '').lower()
-            section = item.get('section', '').lower()
-            content = item.get('content', '').lower()
+            title = item.get('title_lower') or item.get('title', '').lower()
+            section = item.get('section_lower') or item.get('section', '').lower()
+            content = item.get('content_lower') or item.get('content', '').lower()
             
             score = 0
             matched_terms = []
@@ -527,8 +962,8 @@ def filter_and_rank_results(scored_items, search_info, top_k):
 
 def determine_relevance_type(search_info, item):
     """Determine relevance type"""
-    title = item.get('title', '').lower()
-    section = item.get('section', '').lower()
+    title = item.get('title_lower') or item.get('title', '').lower()
+    section = item.get('section_lower') or item.get('section', '').lower()
     
     for term in search_info['primary_terms']:
         if term in title:
@@ -606,8 +1041,11 @@ def check_cache(query_hash):
     """Check query cache with debugging"""
     try:
         print(f"Checking cache for hash: {query_hash}")
-        cached_response = cache_table.get_item(Key={'query_hash': query_hash})
-        if 'Item' in cached_response:
+        cached_response = get_table(CACHE_TABLE).get_item(Key={'query_hash': query_hash})
+        if 'Item' in cached_response and cached_response['Item'].get('ttl', 0) < time.time():
+            # DynamoDB TTL deletes lazily, so expired entries can still be read
+            print(f"Cache entry expired")
+        elif 'Item' in cached_response:
             print(f"Cache HIT found")
             cached_data = cached_response['Item']['response']
             if 'generated_response' in cached_data:
@@ -644,14 +1082,14 @@ def cache_result(query_hash, query, response_data):
             'query_hash': query_hash,
             'query': query,
             'response': converted_response_data,
-            'timestamp': int(time.time()),
+            'timestamp': response_data.get('timestamp', int(time.time())),
             'ttl': int(time.time()) + 1800  # 30 minutes
         }
         
         print(f"Cache item prepared")
 
         print(f"Calling put_item...")
-        cache_table.put_item(Item=cache_item)
+        get_table(CACHE_TABLE).put_item(Item=cache_item)
         
         print(f"Cache WRITE successful for hash: {query_hash}")
         return True
@@ -742,7 +1180,7 @@ def send_custom_metrics(search_results, query):
         
         for i in range(0, len(metrics), 20):
             batch = metrics[i:i+20]
-            cloudwatch.put_metric_data(
+            get_cloudwatch().put_metric_data(
                 Namespace=namespace,
                 MetricData=batch
             )
@@ -751,3 +1189,60 @@ def send_custom_metrics(search_results, query):
     except Exception as e:
         print(f"Failed to send custom metrics: {str(e)}")
 
+def is_prewarm_event(event):
+    """Scheduled warm-up pings and explicit {"prewarm": true} events skip the search path"""
+    return bool(event.get('prewarm')) or event.get('source') == 'aws.events'
+
+def handle_prewarm(cold_start):
+    """Make sure the corpus index is loaded and report the startup state"""
+
+    start_time = time.perf_counter()
+    items = get_corpus()
+    warm_ms = round((time.perf_counter() - start_time) * 1000, 1)
+
+    print(f"Prewarm complete: {len(items)} items, corpus version {_corpus['version']}, {warm_ms}ms")
+    return create_response(200, {
+        'status': 'warm',
+        'cold_start': cold_start,
+        'corpus_items': len(items),
+        'corpus_version': _corpus['version'],
+        'prewarm_ms': warm_ms,
+        'startup': _startup
+    })
+
+def run_init_phase():
+    """
+    Work done at import time runs in Lambda's init phase, which gets a full vCPU burst
+    before the first request arrives, so the corpus index is built here.
+    """
+
+    _startup['import_ms'] = round((time.perf_counter() - _import_started) * 1000, 1)
+    stages = _startup['init_stages_ms']
+
+    if WARM_ON_INIT:
+        try:
+            stage_start = time.perf_counter()
+            get_table(EMBEDDINGS_TABLE)
+            get_table(METADATA_TABLE)
+            stages['dynamodb_client'] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+            stage_start = time.perf_counter()
+            get_corpus_version()
+            stages['corpus_version'] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+            stage_start = time.perf_counter()
+            items = get_corpus()
+            stages['corpus_index'] = round((time.perf_counter() - stage_start) * 1000, 1)
+            _startup['corpus_items'] = len(items)
+        except Exception as e:
+            print(f"Init warm-up FAILED: {str(e)}")
+            _startup['init_error'] = str(e)
+
+    _startup['total_init_ms'] = round((time.perf_counter() - _import_started) * 1000, 1)
+    _startup['import_over_budget'] = _startup['import_ms'] > IMPORT_TIME_BUDGET_MS
+
+    print(f"STARTUP_REPORT {json.dumps(_startup)}")
+    if _startup['import_over_budget']:
+        print(f"Import time {_startup['import_ms']}ms exceeds budget of {IMPORT_TIME_BUDGET_MS}ms")
+
+run_init_phase()